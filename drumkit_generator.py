@@ -9,88 +9,504 @@ Run this script and it will ask you for:
 - File extensions to include
 """
 
+import argparse
+import hashlib
 import os
+import pickle
 import random
+import re
 import shutil
+import sys
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
 
-def get_audio_files(input_dir, extensions):
-    """Find all audio files in the input directory and subdirectories."""
-    audio_files = []
-    
-    # Convert extensions to lowercase for comparison
-    extensions = [ext.lower().strip('.') for ext in extensions]
-    
+# Files that are never samples: macOS resource forks and Ableton analysis files
+_SKIP_PREFIX = '._'
+_SKIP_SUFFIX = '.asd'
+
+# Where directory listings are cached between runs
+SCAN_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'drumkit_gen')
+
+# Linux ioctl that makes a copy-on-write clone (btrfs, xfs, bcachefs, ...)
+_FICLONE = 0x40049409
+
+# macOS clonefile(2) for APFS copy-on-write clones
+_clonefile = None
+if sys.platform == 'darwin':
+    try:
+        import ctypes
+        _clonefile = ctypes.CDLL(None, use_errno=True).clonefile
+    except (OSError, AttributeError):
+        _clonefile = None
+
+
+# Audio file types used when the user doesn't type any
+DEFAULT_EXTENSIONS = ('wav', 'aif', 'aiff', 'mp3', 'flac')
+
+# Filename keywords for each instrument type (case-insensitive).
+# Categories are listed in priority order: the first matching category wins.
+INSTRUMENT_PATTERNS = {
+    'kick': ['kick', 'bd', 'bass', 'bassdrum', 'bass drum', '808', 'sub', 'boom'],
+    'snare': ['snare', 'sn', 'snr', 'snap', 'rim'],
+    'hihat_closed': ['chh', 'closed hat', 'closedhat', 'closedhh', 'closed hihat', 'hihat closed', 'hh closed', 'hhc'],
+    'hihat_open': ['ohh', 'open hat', 'openhat', 'openhh', 'open hihat', 'hihat open', 'hh open', 'hho'],
+    'tom': ['tom', 'tm', 'floor tom', 'floortom', 'hi tom', 'hitom', 'mid tom', 'midtom'],
+    'clap': ['clap', 'cp', 'handclap', 'hand clap'],
+    'shaker': ['shaker', 'shake', 'shk', 'tambourine', 'tamb'],
+    'crash': ['crash', 'cym', 'cymbal', 'ride'],
+    'perc': ['perc', 'percussion', 'bongo', 'conga', 'wood', 'block', 'cowbell', 'bell', 'triangle']
+}
+
+# Ableton-optimized organized kit layout: kicks first, then snares
+ORGANIZED_KIT_STRUCTURE = [
+    ('kick', 4),           # First 4 slots: kicks
+    ('snare', 4),          # Next 4 slots: snares
+    ('hihat_closed', 2),   # Closed hihats
+    ('hihat_open', 2),     # Open hihats
+    ('clap', 1),           # Clap
+    ('perc', 2),           # Percussion
+    ('crash', 1),          # Crash/cymbal
+]
+
+# Every category returned by categorize_audio_files, in priority order
+CATEGORY_NAMES = (*INSTRUMENT_PATTERNS, 'other')
+
+# Each category gets one bit, lowest bit = highest priority
+_BIT_CATEGORIES = list(INSTRUMENT_PATTERNS)
+_KEYWORD_BIT = {}
+for _bit, _category in enumerate(_BIT_CATEGORIES):
+    for _keyword in INSTRUMENT_PATTERNS[_category]:
+        _KEYWORD_BIT[_keyword] = _KEYWORD_BIT.get(_keyword, 0) | (1 << _bit)
+
+# One zero-width lookahead per position finds every keyword occurrence in a
+# single scan, including overlapping ones. Alternatives are ordered by
+# priority so each position reports its highest-priority keyword.
+_KEYWORD_RE = re.compile(
+    '(?=(' + '|'.join(re.escape(k) for k in _KEYWORD_BIT) + '))'
+)
+
+
+def _iter_audio_files(root, suffixes):
+    """Yield audio file paths under root using an explicit os.scandir stack."""
+    skip_prefix = _SKIP_PREFIX
+    skip_suffix = _SKIP_SUFFIX
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        try:
+            it = os.scandir(current)
+        except OSError:
+            # Unreadable folders are skipped, same as os.walk
+            continue
+        with it:
+            for entry in it:
+                name = entry.name
+                # DirEntry caches the readdir type, so this costs no extra stat
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                    continue
+                if name.startswith(skip_prefix) or name.endswith(skip_suffix):
+                    continue
+                # endswith(tuple) checks every suffix in one C call; the name
+                # is only lowercased when the exact-case check misses
+                if name.endswith(suffixes) or name.lower().endswith(suffixes):
+                    yield entry.path
+
+
+def _extension_suffixes(extensions):
+    """Normalize extensions to a tuple of lowercase '.ext' suffixes."""
+    return tuple({'.' + ext.lower().lstrip('.') for ext in extensions})
+
+
+def iter_audio_files(input_dir, extensions):
+    """Lazily yield audio files in the input directory and subdirectories."""
+    return _iter_audio_files(input_dir, _extension_suffixes(extensions))
+
+
+def _scan_cache_file(input_dir, cache_dir):
+    """Return the cache file path for a sample library folder."""
+    key = hashlib.sha1(os.path.abspath(input_dir).encode('utf-8', 'surrogateescape')).hexdigest()
+    return os.path.join(cache_dir, f"scan-{key[:16]}.pkl")
+
+
+def _load_scan_cache(cache_file, input_dir):
+    """Load cached directory listings, or an empty dict if there are none."""
+    try:
+        with open(cache_file, 'rb') as f:
+            cache = pickle.load(f)
+        if cache.get('root') == input_dir:
+            return cache['dirs']
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Ignoring unreadable scan cache: {e}")
+    return {}
+
+
+def _save_scan_cache(cache_file, input_dir, dirs):
+    """Write directory listings to the cache file atomically."""
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        tmp_file = f"{cache_file}.tmp{os.getpid()}"
+        with open(tmp_file, 'wb') as f:
+            pickle.dump({'root': input_dir, 'dirs': dirs}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        print(f"Could not save scan cache: {e}")
+
+
+def _iter_audio_files_cached(root, suffixes, cache, new_cache):
+    """
+    Like _iter_audio_files, but reuses cached listings for folders whose
+    mtime hasn't changed. A folder's mtime changes whenever an entry is
+    added, removed or renamed in it, so only edited folders are re-read.
+    Every visited folder's listing is stored in new_cache.
+    """
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        try:
+            mtime = os.stat(current).st_mtime_ns
+        except OSError:
+            continue
+        
+        cached = cache.get(current)
+        if cached is not None and cached[0] == mtime:
+            _, file_names, subdirs = cached
+        else:
+            file_names = []
+            subdirs = []
+            try:
+                with os.scandir(current) as it:
+                    for entry in it:
+                        name = entry.name
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        elif not (name.startswith(_SKIP_PREFIX) or name.endswith(_SKIP_SUFFIX)):
+                            file_names.append(name)
+            except OSError:
+                continue
+        
+        new_cache[current] = (mtime, file_names, subdirs)
+        stack.extend(subdirs)
+        # Join once per folder; plain concatenation per file is much cheaper
+        prefix = os.path.join(current, '')
+        for name in file_names:
+            if name.endswith(suffixes) or name.lower().endswith(suffixes):
+                yield prefix + name
+
+
+def get_audio_files(input_dir, extensions, cache_dir=None):
+    """
+    Find all audio files in the input directory and subdirectories.
+    If cache_dir is given, folder listings are cached there between runs.
+    """
     print(f"Searching for audio files in: {input_dir}")
     
-    for root, dirs, files in os.walk(input_dir):
-        for file in files:
-            # Skip macOS resource fork files and Ableton analysis files
-            if file.startswith('._') or file.endswith('.asd'):
-                continue
-            
-            file_path = os.path.join(root, file)
-            # Get file extension without the dot
-            file_ext = os.path.splitext(file)[1].lower().strip('.')
-            
-            if file_ext in extensions:
-                audio_files.append(file_path)
+    if cache_dir is None:
+        return list(iter_audio_files(input_dir, extensions))
     
+    suffixes = _extension_suffixes(extensions)
+    cache_file = _scan_cache_file(input_dir, cache_dir)
+    cache = _load_scan_cache(cache_file, input_dir)
+    new_cache = {}
+    audio_files = list(_iter_audio_files_cached(input_dir, suffixes, cache, new_cache))
+    _save_scan_cache(cache_file, input_dir, new_cache)
     return audio_files
 
 
-def create_drum_kit(audio_files, output_dir, max_files, use_symlinks=False):
-    """Create a drum kit by copying or symlinking random audio files."""
-    if not audio_files:
+def _reservoir_sample(items, k):
+    """
+    Pick up to k random items from an iterable in a single pass (Algorithm R).
+    Only k items are held in memory, so huge libraries can be streamed.
+    """
+    reservoir = []
+    for i, item in enumerate(items):
+        if i < k:
+            reservoir.append(item)
+        else:
+            j = random.randint(0, i)
+            if j < k:
+                reservoir[j] = item
+    return reservoir
+
+
+def _fast_sample(population, k, exclude=()):
+    """
+    Pick k random items from a list, skipping anything in the exclude set
+    (which must be a subset of population).
+    When k is small next to the remaining items, random indices are drawn
+    and repeats or excluded items are rejected: O(k) instead of copying the
+    whole population to filter it.
+    """
+    n = len(population)
+    remaining = n - len(exclude)
+    if k * 3 >= remaining or remaining * 2 < n:
+        # Rejection would retry too often; filter and sample directly
+        if exclude:
+            population = [item for item in population if item not in exclude]
+        return random.sample(population, k)
+    
+    seen = set()
+    selected = []
+    while len(selected) < k:
+        item = population[random.randrange(n)]
+        if item not in seen and item not in exclude:
+            seen.add(item)
+            selected.append(item)
+    return selected
+
+
+def _kit_tasks(source_files):
+    """
+    Pair each source file with its destination filename inside the kit.
+    Original filenames are kept; repeated names get a _1, _2, ... suffix so
+    one sample never silently overwrites another. A source file listed more
+    than once (e.g. picked again by the organized kit fallback) is only
+    added once.
+    """
+    counts = Counter()
+    taken = set()  # Lowercased, since macOS/Windows filesystems ignore case
+    seen = set()
+    tasks = []
+    
+    for source_file in source_files:
+        if source_file in seen:
+            continue
+        seen.add(source_file)
+        filename = os.path.basename(source_file)
+        if filename.lower() in taken:
+            name, ext = os.path.splitext(filename)
+            n = counts[filename]
+            while True:
+                n += 1
+                candidate = f"{name}_{n}{ext}"
+                if candidate.lower() not in taken:
+                    break
+            counts[filename] = n
+            filename = candidate
+        taken.add(filename.lower())
+        tasks.append((source_file, filename))
+    
+    return tasks
+
+
+def _open_kit_dir(kit_dir):
+    """
+    Open the kit directory so files can be created relative to it
+    (openat/symlinkat), sparing the kernel a full path walk per file.
+    Returns None on platforms without dir_fd support (Windows).
+    """
+    # os.replace shares os.rename's renameat() support but isn't listed itself
+    if all(func in os.supports_dir_fd for func in (os.open, os.symlink, os.rename, os.unlink)):
+        return os.open(kit_dir, os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0))
+    return None
+
+
+def _copy_fd(src_fd, dst_fd):
+    """Copy all bytes between open file descriptors, in the kernel if possible."""
+    offset = 0
+    try:
+        while True:
+            sent = os.sendfile(dst_fd, src_fd, offset, 1 << 30)
+            if sent == 0:
+                return
+            offset += sent
+    except OSError:
+        if offset:
+            raise
+    
+    # sendfile isn't supported for these files: plain buffered copy
+    with open(src_fd, 'rb', closefd=False) as fsrc, open(dst_fd, 'wb', closefd=False) as fdst:
+        shutil.copyfileobj(fsrc, fdst)
+
+
+def _write_clone(source_file, dest, kit_prefix, dir_fd):
+    """
+    Copy a file as a copy-on-write clone when the filesystem supports it.
+    A clone shares data blocks with the source, so it takes a metadata update
+    instead of streaming bytes. Falls back to a regular copy otherwise
+    (different filesystems, ext4, NTFS, ...).
+    dest is relative to dir_fd when it is set, otherwise a full path.
+    """
+    if fcntl is not None and sys.platform.startswith('linux'):
+        src_fd = os.open(source_file, os.O_RDONLY)
+        try:
+            dst_fd = os.open(dest, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644, dir_fd=dir_fd)
+            try:
+                try:
+                    fcntl.ioctl(dst_fd, _FICLONE, src_fd)
+                except OSError:
+                    # EXDEV, EOPNOTSUPP, EINVAL: clone not possible here.
+                    # Ask the kernel to read ahead aggressively instead.
+                    os.posix_fadvise(src_fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                    _copy_fd(src_fd, dst_fd)
+            finally:
+                os.close(dst_fd)
+        finally:
+            os.close(src_fd)
+        return
+    
+    # clonefile and shutil.copyfile take no dir_fd: use the full path
+    if dir_fd is not None:
+        dest = kit_prefix + dest
+    
+    if _clonefile is not None:
+        if _clonefile(os.fsencode(source_file), os.fsencode(dest), 0) == 0:
+            return
+    
+    shutil.copyfile(source_file, dest)
+
+
+def _clone_file(source_file, filename, kit_prefix, dir_fd):
+    """
+    Clone or copy a file into the kit. Data goes to a temporary name that is
+    renamed into place with os.replace, so an interrupted copy never leaves a
+    truncated sample in the kit for a DAW to pick up.
+    """
+    tmp_name = f"{filename}.part{os.getpid()}"
+    if dir_fd is not None:
+        tmp_path, dest_path = tmp_name, filename
+    else:
+        tmp_path, dest_path = kit_prefix + tmp_name, kit_prefix + filename
+    
+    try:
+        _write_clone(source_file, tmp_path, kit_prefix, dir_fd)
+        os.replace(tmp_path, dest_path, src_dir_fd=dir_fd, dst_dir_fd=dir_fd)
+    except BaseException:
+        try:
+            os.unlink(tmp_path, dir_fd=dir_fd)
+        except OSError:
+            pass
+        raise
+
+
+def _link_or_copy(source_file, filename, kit_prefix, dir_fd, use_symlinks):
+    """Symlink or copy a single file into the kit (runs in a worker thread)."""
+    if use_symlinks:
+        if dir_fd is not None:
+            os.symlink(source_file, filename, dir_fd=dir_fd)
+        else:
+            os.symlink(source_file, kit_prefix + filename)
+    else:
+        _clone_file(source_file, filename, kit_prefix, dir_fd)
+
+
+def _process_files(tasks, kit_dir, use_symlinks, verbose=False):
+    """
+    Copy or symlink (source, filename) pairs into kit_dir concurrently.
+    File copies release the GIL, so threads scale up to storage bandwidth.
+    Each filename is only printed when verbose; otherwise a progress counter
+    is refreshed every 100 files to keep console writes off the hot path.
+    Returns the number of files that failed.
+    """
+    if not tasks:
+        return 0
+    
+    total = len(tasks)
+    done = 0
+    errors = 0
+    kit_prefix = os.path.join(kit_dir, '')
+    max_workers = min(32, (os.cpu_count() or 1) * 4, total)
+    dir_fd = _open_kit_dir(kit_dir)
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(_link_or_copy, source_file, filename, kit_prefix, dir_fd, use_symlinks): filename
+                for source_file, filename in tasks
+            }
+            # Printing only from this thread keeps output from interleaving
+            for future in as_completed(futures):
+                filename = futures[future]
+                done += 1
+                try:
+                    future.result()
+                    if verbose:
+                        print(f"    {filename}")
+                except Exception as e:
+                    print(f"\r    Error {'linking' if use_symlinks else 'copying'} {filename}: {e}")
+                    errors += 1
+                if not verbose and (done % 100 == 0 or done == total):
+                    sys.stdout.write(f"\r    {done}/{total} files")
+                    sys.stdout.flush()
+    finally:
+        if dir_fd is not None:
+            os.close(dir_fd)
+    
+    if not verbose:
+        sys.stdout.write("\n")
+    return errors
+
+
+def create_drum_kit(audio_files, output_dir, max_files, use_symlinks=False, verbose=False, kit_name=None):
+    """
+    Create a drum kit by copying or symlinking random audio files.
+    audio_files can be a list or any iterable, such as iter_audio_files().
+    Set verbose to print every filename instead of a progress counter.
+    kit_name defaults to a timestamped DrumKit_YYYYmmdd_HHMMSS name.
+    """
+    # Select random files (up to max_files)
+    if isinstance(audio_files, (list, tuple)):
+        num_files = min(len(audio_files), max_files)
+        selected_files = random.sample(audio_files, num_files)
+    else:
+        # Stream the files so memory use stays O(max_files)
+        selected_files = _reservoir_sample(audio_files, max_files)
+        num_files = len(selected_files)
+    
+    if not selected_files:
         print("No audio files found!")
         return False
     
-    # Create timestamp for unique folder name
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    kit_name = f"DrumKit_{timestamp}"
+    if kit_name is None:
+        # Create timestamp for unique folder name
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        kit_name = f"DrumKit_{timestamp}"
     kit_dir = os.path.join(output_dir, kit_name)
     
     # Create the kit directory
     os.makedirs(kit_dir, exist_ok=True)
     
-    # Select random files (up to max_files)
-    num_files = min(len(audio_files), max_files)
-    selected_files = random.sample(audio_files, num_files)
-    
     print(f"\nCreating drum kit: {kit_name}")
     action = "Creating symlinks to" if use_symlinks else "Copying"
     print(f"{action} {num_files} files...")
     
     # Copy or symlink files to kit directory
-    for source_file in selected_files:
-        # Get just the filename from the full path
-        filename = os.path.basename(source_file)
-        # Keep original filename exactly as it is
-        dest_path = os.path.join(kit_dir, filename)
-        
-        try:
-            if use_symlinks:
-                os.symlink(source_file, dest_path)
-            else:
-                shutil.copy2(source_file, dest_path)
-            print(f"    {filename}")
-        except Exception as e:
-            print(f"  Error {'linking' if use_symlinks else 'copying'} {filename}: {e}")
-            return False
+    tasks = _kit_tasks(selected_files)
+    if _process_files(tasks, kit_dir, use_symlinks, verbose):
+        print(f"\n  Drum kit is incomplete: {kit_dir}")
+        return False
     
     print(f"\n✓ Drum kit created successfully!")
     print(f"  Location: {kit_dir}")
     return True
 
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Randomized Drum Kit Generator")
+    parser.add_argument('--cache', action=argparse.BooleanOptionalAction, default=True,
+                        help="reuse cached folder listings from earlier scans (default: on)")
+    parser.add_argument('--repl', action='store_true',
+                        help="scan the library once, then generate kits repeatedly without re-scanning")
+    args = parser.parse_args(argv)
+    cache_dir = SCAN_CACHE_DIR if args.cache else None
+    
     print("=" * 60)
     print("          Randomized Drum Kit Generator")
     print("=" * 60)
     print()
     
+    if args.repl:
+        run_repl_mode(cache_dir)
+        return
+    
     # Choose mode
     print("Select mode:")
     print("1. Simple mode (guided setup)")
@@ -105,9 +521,9 @@ def main():
     print()
     
     if advanced_mode:
-        run_advanced_mode()
+        run_advanced_mode(cache_dir)
     else:
-        run_simple_mode()
+        run_simple_mode(cache_dir)
 
 
 def run_simple_mode():
@@ -118,57 +534,36 @@ def categorize_audio_files(audio_files):
     Categorize audio files by instrument type based on filename patterns.
     Returns a dictionary with instrument categories as keys and file lists as values.
     """
-    categories = {
-        'kick': [],
-        'snare': [],
-        'hihat_closed': [],
-        'hihat_open': [],
-        'tom': [],
-        'clap': [],
-        'shaker': [],
-        'crash': [],
-        'perc': [],
-        'other': []
-    }
-    
-    # Define patterns for each instrument type (case-insensitive)
-    patterns = {
-        'kick': ['kick', 'bd', 'bass', 'bassdrum', 'bass drum', '808', 'sub', 'boom'],
-        'snare': ['snare', 'sn', 'snr', 'snap', 'rim'],
-        'hihat_closed': ['chh', 'closed hat', 'closedhat', 'closedhh', 'closed hihat', 'hihat closed', 'hh closed', 'hhc'],
-        'hihat_open': ['ohh', 'open hat', 'openhat', 'openhh', 'open hihat', 'hihat open', 'hh open', 'hho'],
-        'tom': ['tom', 'tm', 'floor tom', 'floortom', 'hi tom', 'hitom', 'mid tom', 'midtom'],
-        'clap': ['clap', 'cp', 'handclap', 'hand clap'],
-        'shaker': ['shaker', 'shake', 'shk', 'tambourine', 'tamb'],
-        'crash': ['crash', 'cym', 'cymbal', 'ride'],
-        'perc': ['perc', 'percussion', 'bongo', 'conga', 'wood', 'block', 'cowbell', 'bell', 'triangle']
-    }
+    categories = {category: [] for category in CATEGORY_NAMES}
+    
+    # Bind everything the loop touches to locals and map each category bit
+    # straight to its output list, keeping per-file work to C-level calls
+    findall = _KEYWORD_RE.findall
+    keyword_bit = _KEYWORD_BIT
+    basename = os.path.basename
+    files_by_bit = {1 << i: categories[category] for i, category in enumerate(_BIT_CATEGORIES)}
+    other_append = categories['other'].append
     
     for file_path in audio_files:
-        filename = os.path.basename(file_path).lower()
-        categorized = False
-        
-        # Check each category
-        for category, keywords in patterns.items():
-            for keyword in keywords:
-                if keyword in filename:
-                    categories[category].append(file_path)
-                    categorized = True
-                    break
-            if categorized:
-                break
-        
-        # If no category matched, put in 'other'
-        if not categorized:
-            categories['other'].append(file_path)
+        # Scan the filename once, OR together the bits of every matched
+        # category, then pick the lowest set bit (highest priority)
+        mask = 0
+        for keyword in findall(basename(file_path).lower()):
+            mask |= keyword_bit[keyword]
+        if mask:
+            files_by_bit[mask & -mask].append(file_path)
+        else:
+            # If no category matched, put in 'other'
+            other_append(file_path)
     
     return categories
 
 
-def create_organized_drum_kit(categorized_files, output_dir, kit_name, kit_structure, use_symlinks=False):
+def create_organized_drum_kit(categorized_files, output_dir, kit_name, kit_structure, use_symlinks=False, verbose=False):
     """
     Create an organized drum kit following the specified structure.
     kit_structure is a list of tuples: [(category, count), ...]
+    Set verbose to print every filename instead of a progress counter.
     """
     kit_dir = os.path.join(output_dir, kit_name)
     os.makedirs(kit_dir, exist_ok=True)
@@ -176,57 +571,102 @@ def create_organized_drum_kit(categorized_files, output_dir, kit_name, kit_struc
     print(f"\nCreating organized drum kit: {kit_name}")
     action = "Creating symlinks to" if use_symlinks else "Copying"
     
-    total_files = 0
+    kit_files = []
     used_files = set()  # Track used files to avoid duplicates
     
     # Create a pool of all available files for fallback
-    all_files = []
-    for category_files in categorized_files.values():
-        all_files.extend(category_files)
+    all_files = [f for category_files in categorized_files.values() for f in category_files]
     
     for category, count in kit_structure:
         available_files = categorized_files.get(category, [])
+        exclude = ()
         
         if not available_files:
             print(f"  Warning: No {category} files found, will use random samples for those slots...")
-            # Use random files from the pool for this category
-            available_files = [f for f in all_files if f not in used_files]
-            if not available_files:
-                available_files = all_files  # Reset if we've used everything
+            # Use unused random files from the pool for this category,
+            # or reset to the whole pool if we've used everything
+            available_files = all_files
+            if len(used_files) < len(all_files):
+                exclude = used_files
         
         # Select random files from this category (up to requested count)
-        num_files = min(len(available_files), count)
+        num_files = min(len(available_files) - len(exclude), count)
         if num_files == 0:
             continue
             
-        selected_files = random.sample(available_files, num_files)
+        selected_files = _fast_sample(available_files, num_files, exclude)
         used_files.update(selected_files)  # Mark these as used
         
         print(f"  {category.replace('_', ' ').title()}: {num_files} files")
         
-        # Copy/link the selected files
-        for source_file in selected_files:
-            filename = os.path.basename(source_file)
-            # Keep original filename exactly as it is
-            dest_path = os.path.join(kit_dir, filename)
-            
-            try:
-                if use_symlinks:
-                    os.symlink(source_file, dest_path)
-                else:
-                    shutil.copy2(source_file, dest_path)
-                print(f"    {filename}")
-                total_files += 1
-            except Exception as e:
-                print(f"    Error {'linking' if use_symlinks else 'copying'} {filename}: {e}")
-                return False
+        kit_files.extend(selected_files)
+    
+    # Copy/link all selected files in one batch
+    tasks = _kit_tasks(kit_files)
+    print(f"{action} {len(tasks)} files...")
+    errors = _process_files(tasks, kit_dir, use_symlinks, verbose)
+    total_files = len(tasks) - errors
+    if errors:
+        print(f"  Organized drum kit is incomplete ({errors} errors)")
+        print(f"  Location: {kit_dir}")
+        return False
     
     print(f"✓ Organized drum kit created with {total_files} files")
     print(f"  Location: {kit_dir}")
     return True
 
 
-def run_advanced_mode():
+def _unique_kit_name(output_dir, kit_name):
+    """Add a numeric suffix if a kit with this name already exists."""
+    candidate = kit_name
+    n = 1
+    while os.path.exists(os.path.join(output_dir, candidate)):
+        n += 1
+        candidate = f"{kit_name}-{n}"
+    return candidate
+
+
+def generate_drum_kits(audio_files, output_dir, max_files, num_kits, use_symlinks=False):
+    """Generate num_kits random drum kits. Returns how many succeeded."""
+    # Number kits from one timestamp instead of waiting for a new second
+    timestamp_base = datetime.now().strftime("%Y%m%d_%H%M%S")
+    successful_kits = 0
+    for kit_num in range(num_kits):
+        if num_kits > 1:
+            kit_name = f"DrumKit_{timestamp_base}_{kit_num+1:02d}"
+        else:
+            kit_name = f"DrumKit_{timestamp_base}"
+        # Kits generated again within the same second (REPL) get a suffix
+        kit_name = _unique_kit_name(output_dir, kit_name)
+        
+        if create_drum_kit(audio_files, output_dir, max_files, use_symlinks, kit_name=kit_name):
+            successful_kits += 1
+    
+    return successful_kits
+
+
+def generate_organized_drum_kits(categorized_files, output_dir, num_kits, use_symlinks=False,
+                                 kit_structure=ORGANIZED_KIT_STRUCTURE):
+    """Generate num_kits organized drum kits. Returns how many succeeded."""
+    timestamp_base = datetime.now().strftime("%Y%m%d_%H%M%S")
+    successful_kits = 0
+    
+    for kit_num in range(num_kits):
+        if num_kits > 1:
+            kit_name = f"OrganizedKit_{timestamp_base}_{kit_num+1:02d}"
+        else:
+            kit_name = f"OrganizedKit_{timestamp_base}"
+        kit_name = _unique_kit_name(output_dir, kit_name)
+        
+        if create_organized_drum_kit(categorized_files, output_dir, kit_name, kit_structure, use_symlinks):
+            successful_kits += 1
+        
+        print()  # Empty line between kits
+    
+    return successful_kits
+
+
+def run_advanced_mode(cache_dir=SCAN_CACHE_DIR):
     """Run advanced mode with intelligent instrument categorization and organized kit structure."""
     print("=== ADVANCED MODE ===")
     print("Intelligent drum kit organization with instrument detection")
@@ -256,7 +696,7 @@ def run_advanced_mode():
     if extensions_input:
         extensions = extensions_input.split()
     else:
-        extensions = ['wav', 'aif', 'aiff', 'mp3', 'flac']
+        extensions = list(DEFAULT_EXTENSIONS)
     
     # Ask about copying vs symlinking
     print("\nFile handling options:")
@@ -273,7 +713,7 @@ def run_advanced_mode():
     print("Scanning and categorizing audio files...")
     
     # Find and categorize all audio files
-    audio_files = get_audio_files(input_dir, extensions)
+    audio_files = get_audio_files(input_dir, extensions, cache_dir)
     if not audio_files:
         print("No audio files found!")
         return
@@ -288,15 +728,7 @@ def run_advanced_mode():
     
     # Define kit structure (Ableton-optimized: kicks first, then snares)
     print("\nUsing Ableton-optimized kit structure:")
-    kit_structure = [
-        ('kick', 4),           # First 4 slots: kicks
-        ('snare', 4),          # Next 4 slots: snares  
-        ('hihat_closed', 2),   # Closed hihats
-        ('hihat_open', 2),     # Open hihats
-        ('clap', 1),           # Clap
-        ('perc', 2),           # Percussion
-        ('crash', 1),          # Crash/cymbal
-    ]
+    kit_structure = ORGANIZED_KIT_STRUCTURE
     
     for category, count in kit_structure:
         available = len(categorized_files.get(category, []))
@@ -315,24 +747,7 @@ def run_advanced_mode():
     print("\n" + "=" * 60)
     
     # Generate organized drum kits
-    timestamp_base = datetime.now().strftime("%Y%m%d_%H%M%S")
-    successful_kits = 0
-    
-    for kit_num in range(num_kits):
-        if num_kits > 1:
-            kit_name = f"OrganizedKit_{timestamp_base}_{kit_num+1:02d}"
-        else:
-            kit_name = f"OrganizedKit_{timestamp_base}"
-        
-        if create_organized_drum_kit(categorized_files, output_dir, kit_name, kit_structure, use_symlinks):
-            successful_kits += 1
-        
-        # Wait between kits for unique timestamps
-        if kit_num < num_kits - 1:
-            import time
-            time.sleep(1)
-        
-        print()  # Empty line between kits
+    successful_kits = generate_organized_drum_kits(categorized_files, output_dir, num_kits, use_symlinks, kit_structure)
     
     print("=" * 60)
     print(f"Generated {successful_kits}/{num_kits} organized drum kits successfully!")
@@ -341,7 +756,7 @@ def run_advanced_mode():
     # Placeholder - will add features based on user requirements
 
 
-def run_simple_mode():
+def run_simple_mode(cache_dir=SCAN_CACHE_DIR):
     """Run the original simple mode with guided prompts."""
     # Get input directory
     while True:
@@ -397,7 +812,7 @@ def run_simple_mode():
     if extensions_input:
         extensions = extensions_input.split()
     else:
-        extensions = ['wav', 'aif', 'aiff', 'mp3', 'flac']
+        extensions = list(DEFAULT_EXTENSIONS)
     
     print(f"\nLooking for files with extensions: {', '.join(extensions)}")
     
@@ -415,7 +830,7 @@ def run_simple_mode():
     print("-" * 60)
     
     # Find all audio files
-    audio_files = get_audio_files(input_dir, extensions)
+    audio_files = get_audio_files(input_dir, extensions, cache_dir)
     
     if not audio_files:
         print("No audio files found!")
@@ -438,20 +853,118 @@ def run_simple_mode():
     print("\n" + "=" * 60)
     
     # Generate drum kits
-    successful_kits = 0
-    for kit_num in range(num_kits):
-        if create_drum_kit(audio_files, output_dir, max_files, use_symlinks):
-            successful_kits += 1
-        
-        # Wait a second between kits to ensure unique timestamps
-        if kit_num < num_kits - 1:
-            import time
-            time.sleep(1)
+    successful_kits = generate_drum_kits(audio_files, output_dir, max_files, num_kits, use_symlinks)
     
     print("=" * 60)
     print(f"Generated {successful_kits}/{num_kits} drum kits successfully!")
     print("Done!")
 
 
+
+def _ask_positive_int(prompt, default=None):
+    """Prompt until the user enters a number greater than 0."""
+    while True:
+        try:
+            answer = input(prompt).strip()
+            value = int(answer or default) if default is not None else int(answer)
+            if value > 0:
+                return value
+            print("Please enter a number greater than 0.")
+        except ValueError:
+            print("Please enter a valid number.")
+
+
+def run_repl_mode(cache_dir=SCAN_CACHE_DIR):
+    """
+    Scan and categorize the sample library once, then keep it in memory
+    while generating any number of kits on request.
+    """
+    print("=== REPL MODE ===")
+    print("Scan once, then generate as many kits as you like")
+    print()
+    
+    # Get input directory
+    while True:
+        input_dir = input("Enter the path to your sample library folder: ").strip()
+        input_dir = input_dir.strip('\'"')
+        
+        if os.path.exists(input_dir) and os.path.isdir(input_dir):
+            break
+        print("That folder doesn't exist. Please try again.")
+    
+    # Get file extensions
+    print("\nWhich audio file types to include?")
+    print("Default: wav, aif, aiff, mp3, flac")
+    extensions_input = input("Press Enter for default, or type extensions: ").strip()
+    
+    if extensions_input:
+        extensions = extensions_input.split()
+    else:
+        extensions = list(DEFAULT_EXTENSIONS)
+    
+    # Ask about copying vs symlinking
+    print("\nFile handling options:")
+    print("1. Copy files (duplicates files, uses more disk space)")
+    print("2. Create symbolic links (points to originals, saves disk space)")
+    while True:
+        choice = input("Choose option (1 or 2): ").strip()
+        if choice in ['1', '2']:
+            use_symlinks = choice == '2'
+            break
+        print("Please enter 1 or 2.")
+    
+    audio_files = []
+    categorized_files = {}
+    command = 'rescan'
+    
+    while True:
+        if command == 'rescan':
+            print("\n" + "=" * 60)
+            audio_files = get_audio_files(input_dir, extensions, cache_dir)
+            categorized_files = categorize_audio_files(audio_files)
+            print(f"Found {len(audio_files)} audio files")
+        
+        elif command == 'generate':
+            if not audio_files:
+                print("No audio files found! Add samples and type 'rescan'.")
+            else:
+                output_dir = input("Enter the output folder (where to save drum kits): ").strip()
+                output_dir = output_dir.strip('\'"')
+                if not os.path.exists(output_dir):
+                    print(f"Creating output directory: {output_dir}")
+                    os.makedirs(output_dir, exist_ok=True)
+                
+                print("Kit type:")
+                print("1. Random kit")
+                print("2. Organized kit (instrument detection)")
+                while True:
+                    kit_type = input("Choose option (1 or 2): ").strip()
+                    if kit_type in ['1', '2']:
+                        break
+                    print("Please enter 1 or 2.")
+                
+                if kit_type == '1':
+                    max_files = _ask_positive_int("How many files per drum kit? (e.g., 10): ")
+                    num_kits = _ask_positive_int("How many drum kits to generate? (1): ", 1)
+                    successful_kits = generate_drum_kits(audio_files, output_dir, max_files, num_kits, use_symlinks)
+                else:
+                    num_kits = _ask_positive_int("How many organized drum kits to generate? (1): ", 1)
+                    successful_kits = generate_organized_drum_kits(categorized_files, output_dir, num_kits, use_symlinks)
+                
+                print(f"Generated {successful_kits}/{num_kits} drum kits successfully!")
+        
+        elif command in ['quit', 'exit', 'q']:
+            print("Done!")
+            return
+        
+        elif command:
+            print("Unknown command. Type generate, rescan or quit.")
+        
+        try:
+            command = input("\ngenerate/rescan/quit> ").strip().lower()
+        except EOFError:
+            command = 'quit'
+
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -9,10 +9,68 @@ Supports saving/loading configurations for repeated use.
 
 import os
 import shutil
+import sys
 import json
+import errno
 import hashlib
+import mmap
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+try:
+    import blake3  # Optional: pip install blake3
+except ImportError:
+    blake3 = None
+
+try:
+    import orjson  # Optional: pip install orjson
+except ImportError:
+    orjson = None
+
+# Content fingerprints only need to tell files apart, not resist attackers,
+# so use BLAKE3 when installed and the stdlib's BLAKE2b otherwise; both are
+# much faster than SHA-256
+HASH_ALGORITHM = 'blake3' if blake3 is not None else 'blake2b'
+
+# Number of log lines flatten_folder collects before writing them out
+LOG_BATCH_SIZE = 256
+
+# How many files past the ones being worked on get read ahead (Linux)
+PREFETCH_AHEAD = 16
+
+# Linux ioctl that makes a copy-on-write clone (btrfs, xfs, bcachefs, ...)
+_FICLONE = 0x40049409
+
+
+def _dumps(obj, indent=False):
+    """Serialize obj to JSON bytes, with orjson when installed."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+        except TypeError:
+            # orjson refuses the surrogate escapes Python uses for file names
+            # that aren't valid UTF-8; stdlib json writes them as \udcxx
+            pass
+    if indent:
+        return json.dumps(obj, indent=2).encode('utf-8')
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+
+def _loads(data):
+    """Parse JSON bytes, with orjson when installed."""
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except ValueError:
+            pass  # e.g. \udcxx escapes written by the json fallback in _dumps
+    return json.loads(data)
+
 
 def save_config(config, config_name):
     """Save configuration to a JSON file."""
@@ -24,8 +82,8 @@ def save_config(config, config_name):
     config_file = os.path.join(config_dir, f"{config_name}.json")
     
     try:
-        with open(config_file, 'w') as f:
-            json.dump(config, f, indent=2)
+        with open(config_file, 'wb') as f:
+            f.write(_dumps(config, indent=True))
         print(f"✓ Configuration saved as '{config_name}'")
         return True
     except Exception as e:
@@ -40,8 +98,8 @@ def load_config(config_name):
     config_file = os.path.join(config_dir, f"{config_name}.json")
     
     try:
-        with open(config_file, 'r') as f:
-            config = json.load(f)
+        with open(config_file, 'rb') as f:
+            config = _loads(f.read())
         return config
     except FileNotFoundError:
         print(f"Configuration '{config_name}' not found.")
@@ -51,127 +109,711 @@ def load_config(config_name):
         return None
 
 
+def load_hash_cache(config_name):
+    """
+    Load the content hash cache saved alongside a configuration.
+    Maps absolute file path -> [size, mtime_ns, "<algorithm>:<hex digest>"].
+    """
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    config_dir = os.path.join(script_dir, "flattener_configs")
+    cache_file = os.path.join(config_dir, f"{config_name}.cache.json")
+    
+    try:
+        with open(cache_file, 'rb') as f:
+            return _loads(f.read())
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"Ignoring unreadable hash cache: {e}")
+        return {}
+
+
+def save_hash_cache(hash_cache, config_name):
+    """Save the content hash cache alongside a configuration."""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    config_dir = os.path.join(script_dir, "flattener_configs")
+    os.makedirs(config_dir, exist_ok=True)
+    
+    cache_file = os.path.join(config_dir, f"{config_name}.cache.json")
+    
+    try:
+        with open(cache_file, 'wb') as f:
+            f.write(_dumps(hash_cache))
+        return True
+    except Exception as e:
+        print(f"Error saving hash cache: {e}")
+        return False
+
+
 def list_configs():
     """List all saved configurations."""
     script_dir = os.path.dirname(os.path.abspath(__file__))
     config_dir = os.path.join(script_dir, "flattener_configs")
     
-    if not os.path.exists(config_dir):
+    try:
+        with os.scandir(config_dir) as it:
+            return [entry.name[:-5] for entry in it  # Remove .json extension
+                    if entry.name.endswith('.json') and not entry.name.endswith('.cache.json')
+                    and entry.is_file()]
+    except FileNotFoundError:
         return []
+
+
+def _scan_dir(dir_path, ext_set):
+    """
+    List one folder (runs in a worker thread).
+    
+    Returns:
+        Tuple of (matching file DirEntry objects, subfolder paths)
+    """
+    files = []
+    subdirs = []
+    try:
+        with os.scandir(dir_path) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                    continue
+                if entry.is_dir():
+                    continue  # Symlinks to folders aren't followed, same as os.walk
+                
+                if ext_set is not None:
+                    # Check if file extension matches filter; most extensions
+                    # are already lowercase, so only lowercase on a miss
+                    _, dot, ext = entry.name.rpartition('.')
+                    if not dot or (ext not in ext_set and ext.lower() not in ext_set):
+                        continue
+                
+                files.append(entry)
+    except OSError:
+        pass  # Unreadable folders are skipped, same as os.walk
     
-    configs = []
-    for file in os.listdir(config_dir):
-        if file.endswith('.json'):
-            configs.append(file[:-5])  # Remove .json extension
+    return files, subdirs
+
+
+def _iter_file_entries(input_dir, extensions=None):
+    """
+    Yield a DirEntry for every matching file under input_dir, top-down in
+    the same order as os.walk. Subfolders are listed ahead of time on a
+    small thread pool, so the open/getdents latency of many folders
+    overlaps (a big win on network drives and cold caches).
+    """
+    ext_set = None
+    if extensions:
+        # Convert extensions to a lowercase set once for O(1) lookups
+        ext_set = frozenset(ext.lower().strip('.') for ext in extensions)
     
-    return configs
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        stack = [executor.submit(_scan_dir, input_dir, ext_set)]
+        while stack:
+            files, subdirs = stack.pop().result()
+            # Start listing every subfolder now; reversed so they are
+            # popped (and yielded) in listing order
+            stack.extend(reversed([executor.submit(_scan_dir, d, ext_set) for d in subdirs]))
+            yield from files
 
 
 def get_all_files(input_dir, extensions=None):
     """
     Recursively find all files in the input directory.
     
+    Walks the tree with os.scandir, whose DirEntry objects carry the file
+    type from the directory listing, so no per-file stat() is needed.
+    
     Args:
         input_dir: Path to input directory
         extensions: List of file extensions to include (None = all files)
     
     Returns:
-        List of file paths
+        Iterator of file paths
+    """
+    for entry in _iter_file_entries(input_dir, extensions):
+        yield entry.path
+
+
+def _new_hash():
+    """Create a hash object for HASH_ALGORITHM."""
+    if blake3 is not None:
+        return blake3.blake3(max_threads=blake3.blake3.AUTO)
+    return hashlib.blake2b(digest_size=32)
+
+
+def _advise_sequential(f):
+    """Tell the kernel a file will be read front to back (bigger readahead)."""
+    if hasattr(os, 'posix_fadvise'):
+        try:
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        except OSError:
+            pass
+
+
+def _advise_file(path, advice):
+    """Give the kernel a posix_fadvise hint about a whole file."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, advice)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _prefetch_files(paths, slots, stop):
     """
-    all_files = []
+    Ask the kernel to start reading files in the order they will be
+    processed (runs in its own thread). Each file takes a slot from the
+    semaphore, which workers give back as they finish, so reading never
+    runs too far ahead of the copies. Paths that are None (files whose
+    data won't be read) still take their slot but aren't read ahead.
+    """
+    for path in paths:
+        slots.acquire()
+        if stop.is_set():
+            return
+        if path is not None:
+            _advise_file(path, os.POSIX_FADV_WILLNEED)
+
+
+def file_hash(filepath):
+    """
+    Return the HASH_ALGORITHM digest of a file's contents.
+    The file is memory-mapped and hashed in a single update() call, so the
+    hash runs in C over the page cache with the GIL released. Files that
+    can't be mapped are read with hashlib.file_digest (Python 3.11+) or in
+    1 MiB chunks.
+    """
+    file_hasher = _new_hash()
+    fd = os.open(filepath, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+    try:
+        if os.fstat(fd).st_size == 0:
+            return file_hasher.digest()  # Empty files can't be mapped
+        m = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        m = None
+    finally:
+        os.close(fd)  # The mapping stays valid after the descriptor is closed
     
-    if extensions:
-        # Convert extensions to lowercase for comparison
-        extensions = [ext.lower().strip('.') for ext in extensions]
-    
-    for root, dirs, files in os.walk(input_dir):
-        for file in files:
-            file_path = os.path.join(root, file)
-            
-            if extensions:
-                # Check if file extension matches filter
-                file_ext = os.path.splitext(file)[1].lower().strip('.')
-                if file_ext not in extensions:
-                    continue
-            
-            all_files.append(file_path)
+    if m is not None:
+        with m:
+            if hasattr(mmap, 'MADV_SEQUENTIAL'):
+                m.madvise(mmap.MADV_SEQUENTIAL)
+            file_hasher.update(m)
+        return file_hasher.digest()
     
-    return all_files
+    with open(filepath, "rb", buffering=0) as f:
+        _advise_sequential(f)
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(f, _new_hash).digest()
+        
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            file_hasher.update(chunk)
+        return file_hasher.digest()
 
 
-def files_are_identical(file1, file2):
+def cached_file_hash(filepath, hash_cache):
+    """
+    Return the digest of a file, reusing the digest stored in hash_cache
+    while the file's size and modification time are unchanged. Digests are
+    tagged with HASH_ALGORITHM, so switching algorithms invalidates them.
+    """
+    st = os.stat(filepath)
+    key = os.path.abspath(filepath)
+    prefix = f"{HASH_ALGORITHM}:"
+    entry = hash_cache.get(key)
+    if (entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns
+            and entry[2].startswith(prefix)):
+        return bytes.fromhex(entry[2][len(prefix):])
+    
+    digest = file_hash(filepath)
+    hash_cache[key] = [st.st_size, st.st_mtime_ns, prefix + digest.hex()]
+    return digest
+
+
+def files_are_identical(file1, size1, file2, size2, hash_cache=None):
     """
     Compare two files to see if they are identical by checking file size first,
-    then comparing content hashes for efficiency.
+    then streaming both files and comparing them block by block. Sizes are
+    passed in by the caller (who already has them from the directory scan),
+    so no extra stat() is made.
+    Stops at the first differing block, so files that differ early are
+    barely read, and each file is read at most once.
+    
+    With a hash_cache (repeated runs of a saved configuration), digests are
+    compared instead, so files seen on an earlier run aren't read again.
     
     Args:
         file1: Path to first file
+        size1: Size of the first file in bytes
         file2: Path to second file
+        size2: Size of the second file in bytes
+        hash_cache: Optional dict used by cached_file_hash
     
     Returns:
         True if files are identical, False otherwise
+    
+    Raises:
+        OSError: If either file can't be read. Nothing is printed here, as
+            this runs in worker threads; callers log the error.
     """
-    try:
-        # Quick size check first
-        if os.path.getsize(file1) != os.path.getsize(file2):
-            return False
-        
-        # If sizes match, compare file hashes
-        def get_file_hash(filepath):
-            hash_sha256 = hashlib.sha256()
-            with open(filepath, "rb") as f:
-                # Read file in chunks for memory efficiency
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hash_sha256.update(chunk)
-            return hash_sha256.hexdigest()
-        
-        return get_file_hash(file1) == get_file_hash(file2)
-        
-    except Exception as e:
-        print(f"  Error comparing files: {e}")
+    # Quick size check first
+    if size1 != size2:
         return False
+    
+    if hash_cache is not None:
+        return cached_file_hash(file1, hash_cache) == cached_file_hash(file2, hash_cache)
+    
+    # If sizes match, compare contents in 1 MiB blocks (buffered
+    # readinto fills the whole block unless it hits end of file)
+    buf1 = bytearray(1 << 20)
+    buf2 = bytearray(1 << 20)
+    with open(file1, "rb") as f1, open(file2, "rb") as f2:
+        _advise_sequential(f1)
+        _advise_sequential(f2)
+        while True:
+            n1 = f1.readinto(buf1)
+            n2 = f2.readinto(buf2)
+            if n1 != n2:
+                return False
+            if n1 == 0:
+                return True
+            if n1 == len(buf1):
+                if buf1 != buf2:
+                    return False
+            elif memoryview(buf1)[:n1] != memoryview(buf2)[:n2]:
+                return False
 
 
-def handle_name_conflict(dest_path):
+def handle_name_conflict(dest_path, taken=None):
     """
     Handle file name conflicts by adding a number suffix.
     
     Args:
         dest_path: Destination file path
+        taken: Set of casefolded file names already present or claimed
+            in the destination directory; the returned name is added to
+            it. Read from the directory when not given. Names are compared
+            casefolded because macOS and Windows treat "Kick.wav" and
+            "kick.wav" as the same file.
     
     Returns:
         A unique file path that doesn't exist
     """
-    if not os.path.exists(dest_path):
-        return dest_path
-    
     # Split path into directory, name, and extension
     dir_path = os.path.dirname(dest_path)
     filename = os.path.basename(dest_path)
+    
+    if taken is None:
+        taken = {name.casefold() for name in os.listdir(dir_path or '.')}
+    
+    if filename.casefold() not in taken:
+        taken.add(filename.casefold())
+        return dest_path
+    
     name, ext = os.path.splitext(filename)
     
     # Try adding numbers until we find a unique name
     counter = 1
     while True:
         new_filename = f"{name}_{counter:03d}{ext}"
-        new_path = os.path.join(dir_path, new_filename)
         
-        if not os.path.exists(new_path):
-            return new_path
+        if new_filename.casefold() not in taken:
+            taken.add(new_filename.casefold())
+            return os.path.join(dir_path, new_filename)
         
         counter += 1
 
 
-def flatten_folder(input_dir, output_dir, extensions=None, move_files=False, conflict_resolution="rename"):
+def _fast_copy(source_file, dest_path):
+    """
+    Copy a file with its metadata like shutil.copy2, but inside the kernel.
+    Tries a copy-on-write clone first (no data is copied at all), then
+    os.copy_file_range. Falls back to shutil.copy2 when neither works here.
+    """
+    if fcntl is None or not hasattr(os, 'copy_file_range'):
+        shutil.copy2(source_file, dest_path)
+        return
+    
+    copied = False
+    src_fd = os.open(source_file, os.O_RDONLY)
+    try:
+        dst_fd = os.open(dest_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+        try:
+            try:
+                fcntl.ioctl(dst_fd, _FICLONE, src_fd)
+                copied = True
+            except OSError:
+                # No reflink support: let the kernel copy the bytes
+                remaining = os.fstat(src_fd).st_size
+                try:
+                    while remaining > 0:
+                        sent = os.copy_file_range(src_fd, dst_fd, remaining)
+                        if sent == 0:
+                            break
+                        remaining -= sent
+                    copied = True
+                except OSError:
+                    if os.lseek(dst_fd, 0, os.SEEK_CUR):
+                        raise  # Failed part way through
+        finally:
+            os.close(dst_fd)
+    finally:
+        os.close(src_fd)
+    
+    if copied:
+        shutil.copystat(source_file, dest_path)
+    else:
+        shutil.copy2(source_file, dest_path)
+
+
+def _move_file(source_file, dest_path):
+    """Move a file; a plain rename unless it really crosses filesystems."""
+    try:
+        os.rename(source_file, dest_path)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(source_file, dest_path)
+    return "Moved"
+
+
+def _make_processor(move_files, link_files, same_fs):
+    """
+    Build the function that puts one file at its destination.
+    
+    The operation and filesystem don't change during a run, so the choice
+    between move, hard link and copy is made once here instead of being
+    re-checked for every file.
+    
+    Returns:
+        Tuple of (function (source_file, dest_path) -> action taken
+        ("Moved", "Linked" or "Copied"), whether that function reads the
+        file's data)
+    """
+    if same_fs:
+        copy = _fast_copy
+    else:
+        copy = shutil.copy2
+    
+    if hasattr(os, 'posix_fadvise'):
+        def copy_file(source_file, dest_path):
+            copy(source_file, dest_path)
+            # The source won't be read again; don't let it crowd the page cache
+            _advise_file(source_file, os.POSIX_FADV_DONTNEED)
+            return "Copied"
+    else:
+        def copy_file(source_file, dest_path):
+            copy(source_file, dest_path)
+            return "Copied"
+    
+    if move_files:
+        if same_fs:
+            # A plain rename is a single syscall; shutil.move only matters
+            # when the file really lives on another filesystem
+            return _move_file, False
+        
+        def move_file(source_file, dest_path):
+            shutil.move(source_file, dest_path)
+            return "Moved"
+        return move_file, True
+    
+    if link_files and same_fs:
+        def link_file(source_file, dest_path):
+            try:
+                os.link(source_file, dest_path)
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise
+                return copy_file(source_file, dest_path)
+            return "Linked"
+        return link_file, False
+    
+    return copy_file, True
+
+
+def _flatten_file(source_entry, dest_path, dest_size, process, taken, taken_lock, hash_cache):
+    """
+    Move or copy one file into the output directory (runs in a worker thread).
+    When the name is taken, dest_path is the file that already owns it
+    (possibly spelled in a different case) and dest_size is its size;
+    dest_size is None when the name is free.
+    
+    Returns:
+        Tuple of (result key, list of log lines)
+    """
+    source_file = source_entry.path
+    filename = source_entry.name
+    messages = []
+    
+    # Handle file name conflicts
+    if dest_size is not None:
+        # Check if files are actually identical. Files of different sizes
+        # can't be, so only same-size files are ever opened. Files that
+        # can't be compared are kept, as if they were different.
+        source_size = source_entry.stat().st_size
+        try:
+            identical = files_are_identical(source_file, source_size, dest_path, dest_size, hash_cache)
+        except Exception as e:
+            messages.append(f"  Error comparing files: {e}")
+            identical = False
+        if identical:
+            return 'skipped', messages + [f"  Skipping (identical file): {filename}"]
+        
+        # Files have same name but different content - always keep both by renaming.
+        # The lock keeps two workers from picking the same new name.
+        with taken_lock:
+            dest_path = handle_name_conflict(os.path.join(os.path.dirname(dest_path), filename), taken)
+        new_filename = os.path.basename(dest_path)
+        messages.append(f"  Renaming (different content): {filename} -> {new_filename}")
+    
+    action = process(source_file, dest_path)
+    messages.append(f"  {action}: {filename}")
+    return 'processed', messages
+
+
+def _run_passes(passes, results):
+    """
+    Run worker tasks on a thread pool, one pass after another, and tally
+    their results.
+    
+    Args:
+        passes: List of passes; each a list of (source file, worker, args,
+            read ahead) tuples. Workers return (result key, list of log
+            lines). Source files are only read ahead (see _prefetch_files)
+            when their worker is going to read their data.
+        results: Results dictionary updated in place
+    """
+    # Workers never print; their log lines are collected here and written
+    # in batches, so the console isn't hit with one write per file
+    log = []
+    
+    def flush_log():
+        if log:
+            sys.stdout.write("\n".join(log) + "\n")
+            sys.stdout.flush()
+            log.clear()
+    
+    max_workers = min(32, (os.cpu_count() or 1) * 2)
+    prefetch = hasattr(os, 'posix_fadvise')
+    stop = threading.Event()  # Ends a prefetcher left waiting after an error
+    slots = None
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for tasks in passes:
+                if prefetch and any(task[3] for task in tasks):
+                    # Read ahead of every file in flight plus PREFETCH_AHEAD more
+                    slots = threading.Semaphore(max_workers + PREFETCH_AHEAD)
+                    prefetcher = threading.Thread(
+                        target=_prefetch_files,
+                        args=([source_file if read_ahead else None
+                               for source_file, _, _, read_ahead in tasks], slots, stop),
+                        daemon=True
+                    )
+                    prefetcher.start()
+                    
+                    def run(worker, *args, slots=slots):
+                        try:
+                            return worker(*args)
+                        finally:
+                            slots.release()
+                    
+                    futures = {
+                        executor.submit(run, worker, *args): source_file
+                        for source_file, worker, args, _ in tasks
+                    }
+                else:
+                    futures = {
+                        executor.submit(worker, *args): source_file
+                        for source_file, worker, args, _ in tasks
+                    }
+                for future in as_completed(futures):
+                    source_file = futures[future]
+                    try:
+                        key, messages = future.result()
+                        log.extend(messages)
+                        results[key] += 1
+                    except Exception as e:
+                        log.append(f"  Error processing {source_file}: {e}")
+                        results['errors'] += 1
+                        results['error_files'].append(source_file)
+                    
+                    if len(log) >= LOG_BATCH_SIZE:
+                        flush_log()
+    finally:
+        if slots is not None:
+            stop.set()
+            slots.release()
+        flush_log()
+
+
+def _store_object(source_entry, output_dir, process, present, present_lock, hash_cache, object_path=None):
+    """
+    Store one file in a content-addressed output directory (runs in a
+    worker thread). The file lands at <hash[:2]>/<hash[2:]><ext>; if an
+    object with that path is already present, nothing is written. Data
+    goes to a temporary name that is renamed into place with os.replace,
+    so an interrupted copy never leaves a truncated object that a later
+    run would take as already stored. When object_path is given (known
+    from index.json for an unchanged file) the file isn't hashed again.
+    
+    Returns:
+        Tuple of (result key, list of log lines, object path relative to output_dir)
+    """
+    source_file = source_entry.path
+    filename = source_entry.name
+    if object_path is None:
+        if hash_cache is not None:
+            digest = cached_file_hash(source_file, hash_cache).hex()
+        else:
+            digest = file_hash(source_file).hex()
+        object_path = f"{digest[:2]}/{digest[2:]}{os.path.splitext(filename)[1].lower()}"
+    
+    with present_lock:
+        if object_path in present:
+            return 'skipped', [f"  Skipping (already stored): {filename}"], object_path
+        present.add(object_path)
+    
+    dest_path = os.path.join(output_dir, *object_path.split('/'))
+    # Object names are hex digits, so the ".tmp-" prefix can't clash with one
+    tmp_path = os.path.join(os.path.dirname(dest_path), f".tmp-{os.path.basename(dest_path)}-{os.getpid()}")
+    try:
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        action = process(source_file, tmp_path)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        with present_lock:
+            present.discard(object_path)
+        raise
+    return 'processed', [f"  {action}: {filename} -> {object_path}"], object_path
+
+
+def _flatten_cas(input_dir, output_dir, extensions, move_files, hash_cache, link_files):
+    """
+    Flatten into a content-addressed layout (conflict_resolution "cas").
+    
+    Every distinct file content is stored once under its HASH_ALGORITHM
+    digest, so duplicates never cost a copy and name clashes can't happen.
+    index.json in the output directory maps each source path (relative to
+    input_dir) to [size, mtime_ns, object path]. Objects already on disk
+    are not written again, and files whose size and modification time
+    match their index entry aren't even re-read, so repeating a run is
+    close to free.
+    """
+    results = {
+        'processed': 0,
+        'skipped': 0,
+        'conflicts': 0,
+        'errors': 0,
+        'error_files': []
+    }
+    
+    os.makedirs(output_dir, exist_ok=True)
+    index_file = os.path.join(output_dir, "index.json")
+    try:
+        with open(index_file, 'rb') as f:
+            index = _loads(f.read())
+    except FileNotFoundError:
+        index = {}
+    except Exception as e:
+        print(f"Ignoring unreadable index: {e}")
+        index = {}
+    
+    # Objects already stored, read from the two-character bucket folders.
+    # Temporary files left by an interrupted run are removed.
+    present = set()
+    with os.scandir(output_dir) as it:
+        buckets = [entry for entry in it if len(entry.name) == 2 and entry.is_dir()]
+    for bucket in buckets:
+        with os.scandir(bucket.path) as it:
+            for entry in it:
+                if entry.name.startswith('.tmp-'):
+                    try:
+                        os.unlink(entry.path)
+                    except OSError:
+                        pass
+                else:
+                    present.add(f"{bucket.name}/{entry.name}")
+    present_lock = threading.Lock()
+    
+    same_fs = os.stat(input_dir).st_dev == os.stat(output_dir).st_dev
+    process, _ = _make_processor(move_files, link_files, same_fs)
+    
+    entries = list(_iter_file_entries(input_dir, extensions))
+    print(f"Found {len(entries)} files to process...")
+    
+    def store(source_entry, rel_path, st, known_object):
+        key, messages, object_path = _store_object(source_entry, output_dir, process, present,
+                                                   present_lock, hash_cache, known_object)
+        if st is not None:
+            index[rel_path] = [st.st_size, st.st_mtime_ns, object_path]
+        return key, messages
+    
+    tasks = []
+    for entry in entries:
+        # Index keys always use forward slashes, whatever the platform
+        rel_path = os.path.relpath(entry.path, input_dir).replace(os.sep, '/')
+        try:
+            st = entry.stat()
+        except OSError:
+            st = None
+        known_object = None
+        known = index.get(rel_path)
+        if (st is not None and isinstance(known, list) and len(known) == 3
+                and known[0] == st.st_size and known[1] == st.st_mtime_ns):
+            known_object = known[2]
+        # Files that have to be hashed (or stored again) are read ahead
+        read_ahead = known_object is None or known_object not in present
+        tasks.append((entry.path, store, (entry, rel_path, st, known_object), read_ahead))
+    
+    try:
+        _run_passes([tasks], results)
+    finally:
+        # Written to a temporary file first so an interrupted run never
+        # leaves a truncated index behind. A failure here is reported
+        # without hiding an error that is already propagating.
+        try:
+            with open(index_file + ".tmp", 'wb') as f:
+                f.write(_dumps(index, indent=True))
+            os.replace(index_file + ".tmp", index_file)
+        except Exception as e:
+            print(f"Error saving index: {e}")
+            try:
+                os.unlink(index_file + ".tmp")
+            except OSError:
+                pass
+    
+    return results
+
+
+def flatten_folder(input_dir, output_dir, extensions=None, move_files=False, conflict_resolution="rename",
+                   hash_cache=None, link_files=False):
     """
     Flatten a folder structure by moving/copying all files to a single directory.
     
+    Files are processed on a thread pool in two passes: first every file
+    whose name is still free, then the files whose name collides with an
+    earlier file or one already in the output directory. Colliding files
+    are therefore always compared against a fully written file.
+    
     Args:
         input_dir: Source directory path
         output_dir: Destination directory path
         extensions: List of file extensions to include (None = all files)
         move_files: If True, move files. If False, copy files.
-        conflict_resolution: How to handle name conflicts ("rename", "skip", "overwrite")
+        conflict_resolution: How to handle name conflicts ("rename", "skip", "overwrite",
+            "cas"). Identical files are always skipped and different files
+            always renamed, so apart from "cas" (see _flatten_cas) this
+            currently doesn't change the outcome.
+        hash_cache: Optional dict of content hashes reused across runs
+            (see load_hash_cache); updated in place
+        link_files: If True (and not moving), hard link files instead of
+            copying them when input and output share a filesystem
     
     Returns:
         Dictionary with operation results
@@ -184,59 +826,68 @@ def flatten_folder(input_dir, output_dir, extensions=None, move_files=False, con
         'error_files': []
     }
     
+    if conflict_resolution == "cas":
+        return _flatten_cas(input_dir, output_dir, extensions, move_files, hash_cache, link_files)
+    
     # Create output directory if it doesn't exist
     os.makedirs(output_dir, exist_ok=True)
     
-    # Get all files to process
-    all_files = get_all_files(input_dir, extensions)
+    # Names in the output directory, plus every name claimed during this
+    # run; checked in memory instead of probing the disk with stat().
+    # Keyed casefolded, so names differing only in case count as the same
+    # name (they are on macOS and Windows filesystems).
+    with os.scandir(output_dir) as it:
+        name_owners = {entry.name.casefold(): entry for entry in it}
+    taken = set(name_owners)
+    taken_lock = threading.Lock()
     
-    print(f"Found {len(all_files)} files to process...")
+    # Clones and copy_file_range only pay off within one filesystem
+    same_fs = os.stat(input_dir).st_dev == os.stat(output_dir).st_dev
     
-    for source_file in all_files:
+    # Split files into name-free ones and name conflicts. Each conflict
+    # carries the size of the file that owns its name (statted once per
+    # name, before anything is moved), so different-size files are renamed
+    # without ever being compared.
+    first_pass = []
+    conflicts = []
+    for entry in _iter_file_entries(input_dir, extensions):
+        key = entry.name.casefold()
+        if key in taken:
+            owner = name_owners[key]
+            try:
+                dest_size = owner.stat().st_size
+            except OSError:
+                dest_size = -1  # Owner unreadable: treat as different content
+            # Compared against the owner's file, spelled the way it is on disk
+            conflicts.append((entry, os.path.join(output_dir, owner.name), dest_size))
+        else:
+            taken.add(key)
+            name_owners[key] = entry
+            first_pass.append((entry, os.path.join(output_dir, entry.name), None))
+    results['conflicts'] = len(conflicts)
+    
+    print(f"Found {len(first_pass) + len(conflicts)} files to process...")
+    
+    process, reads_data = _make_processor(move_files, link_files, same_fs)
+    worker_args = (process, taken, taken_lock, hash_cache)
+    
+    def will_read(entry, dest_size):
+        # Copies read every file; renames and links only read the conflicts
+        # that have to be compared (same size as the file owning the name)
+        if reads_data:
+            return True
+        if dest_size is None:
+            return False
         try:
-            filename = os.path.basename(source_file)
-            dest_path = os.path.join(output_dir, filename)
-            
-            # Handle file name conflicts
-            if os.path.exists(dest_path):
-                results['conflicts'] += 1
-                
-                # Check if files are actually identical
-                if files_are_identical(source_file, dest_path):
-                    print(f"  Skipping (identical file): {filename}")
-                    results['skipped'] += 1
-                    continue
-                
-                # Files have same name but different content - always keep both by renaming
-                dest_path = handle_name_conflict(dest_path)
-                new_filename = os.path.basename(dest_path)
-                print(f"  Renaming (different content): {filename} -> {new_filename}")
-                
-            else:
-                # No conflict, handle other conflict resolution options for truly identical cases
-                if conflict_resolution == "skip":
-                    # This only applies to identical files now
-                    pass  # We already handle identical files above
-                elif conflict_resolution == "overwrite":
-                    # This only applies to identical files now  
-                    pass  # We already handle identical files above
-                # For any case, we proceed with the dest_path (original or renamed)
-            
-            # Move or copy the file
-            if move_files:
-                shutil.move(source_file, dest_path)
-                action = "Moved"
-            else:
-                shutil.copy2(source_file, dest_path)
-                action = "Copied"
-            
-            print(f"  {action}: {filename}")
-            results['processed'] += 1
-            
-        except Exception as e:
-            print(f"  Error processing {source_file}: {e}")
-            results['errors'] += 1
-            results['error_files'].append(source_file)
+            return entry.stat().st_size == dest_size
+        except OSError:
+            return False
+    
+    _run_passes([
+        [(entry.path, _flatten_file, (entry, dest_path, dest_size) + worker_args, will_read(entry, dest_size))
+         for entry, dest_path, dest_size in tasks]
+        for tasks in (first_pass, conflicts)
+    ], results)
     
     return results
 
@@ -251,6 +902,7 @@ def main():
     saved_configs = list_configs()
     
     config = None
+    cache_name = None  # Saved configuration whose hash cache to use
     if saved_configs:
         print("Saved configurations found:")
         for i, config_name in enumerate(saved_configs, 1):
@@ -280,13 +932,14 @@ def main():
         output_dir = config.get('output_dir', '')
         extensions = config.get('extensions')
         move_files = config.get('move_files', False)
+        link_files = config.get('link_files', False)
         conflict_resolution = config.get('conflict_resolution', 'rename')
         
         print(f"\nUsing saved settings:")
         print(f"  Input folder: {input_dir}")
         print(f"  Output folder: {output_dir}")
         print(f"  Extensions: {extensions if extensions else 'All files'}")
-        print(f"  Operation: {'Move' if move_files else 'Copy'}")
+        print(f"  Operation: {'Move' if move_files else 'Hard link' if link_files else 'Copy'}")
         print(f"  Conflicts: {conflict_resolution}")
         
         # Ask if user wants to modify any settings
@@ -298,6 +951,8 @@ def main():
             if not os.path.exists(input_dir):
                 print(f"Warning: Input directory no longer exists: {input_dir}")
                 config = None
+            else:
+                cache_name = config_name
     
     if not config:
         # Manual configuration
@@ -307,21 +962,30 @@ def main():
         save_choice = input("\nSave this configuration for future use? (y/N): ").strip().lower()
         if save_choice in ['y', 'yes']:
             config_name = input("Enter a name for this configuration: ").strip()
-            if config_name:
-                save_config(config, config_name)
+            if config_name and save_config(config, config_name):
+                cache_name = config_name
     
     print("\n" + "=" * 60)
     print("Processing files...")
     print()
     
+    # Saved configurations remember file hashes between runs
+    hash_cache = load_hash_cache(cache_name) if cache_name else None
+    
     # Perform the flattening operation
-    results = flatten_folder(
-        config['input_dir'], 
-        config['output_dir'], 
-        config['extensions'], 
-        config['move_files'], 
-        config['conflict_resolution']
-    )
+    try:
+        results = flatten_folder(
+            config['input_dir'], 
+            config['output_dir'], 
+            config['extensions'], 
+            config['move_files'], 
+            config['conflict_resolution'],
+            hash_cache,
+            config.get('link_files', False)
+        )
+    finally:
+        if hash_cache is not None:
+            save_hash_cache(hash_cache, cache_name)
     
     # Show results
     print("\n" + "=" * 60)
@@ -386,37 +1050,41 @@ def get_manual_config():
         
         print(f"Will process files with extensions: {', '.join(extensions)}")
     
-    # Copy vs Move
+    # Copy vs Move vs Hard link
     print("\nOperation type:")
     print("1. Copy files (originals remain in place)")
     print("2. Move files (originals are moved)")
+    print("3. Hard link files (no extra disk space, same drive only; others are copied)")
     
     while True:
-        choice = input("Choose option (1 or 2): ").strip()
-        if choice in ['1', '2']:
+        choice = input("Choose option (1, 2, or 3): ").strip()
+        if choice in ['1', '2', '3']:
             move_files = choice == '2'
+            link_files = choice == '3'
             break
-        print("Please enter 1 or 2.")
+        print("Please enter 1, 2, or 3.")
     
     # Conflict resolution
     print("\nFile name conflict resolution:")
     print("1. Rename (add number suffix to duplicates)")
     print("2. Skip (don't process files with existing names)")
     print("3. Overwrite (replace existing files)")
+    print("4. Content-addressed (store each distinct file once by its hash; names kept in index.json)")
     
     while True:
-        choice = input("Choose option (1, 2, or 3): ").strip()
-        if choice in ['1', '2', '3']:
-            conflict_options = {'1': 'rename', '2': 'skip', '3': 'overwrite'}
+        choice = input("Choose option (1, 2, 3, or 4): ").strip()
+        if choice in ['1', '2', '3', '4']:
+            conflict_options = {'1': 'rename', '2': 'skip', '3': 'overwrite', '4': 'cas'}
             conflict_resolution = conflict_options[choice]
             break
-        print("Please enter 1, 2, or 3.")
+        print("Please enter 1, 2, 3, or 4.")
     
     return {
         'input_dir': input_dir,
         'output_dir': output_dir,
         'extensions': extensions,
         'move_files': move_files,
+        'link_files': link_files,
         'conflict_resolution': conflict_resolution
     }
 